@@ -1,5 +1,8 @@
 #!/usr/bin/env python3
-"""Lightweight schema-contract checks for game/agent_state.json."""
+"""Lightweight schema-contract checks for game/agent_state.json.
+
+Hand-coded so every violation is reported, not just the first.
+"""
 
 import argparse
 import json
@@ -51,6 +54,28 @@ def check_quests_contract(data: Dict[str, Any], errors: List[str]) -> None:
         ensure_type(errors, q, "completed", bool, path)
 
 
+def check_inventory_contract(data: Dict[str, Any], errors: List[str]) -> None:
+    inv = data.get("inventory")
+    if inv is None:
+        return
+    if not isinstance(inv, dict):
+        err(errors, "inventory", f"expected object, got {type(inv).__name__}")
+        return
+    items = inv.get("items")
+    if items is None:
+        return
+    if not isinstance(items, list):
+        err(errors, "inventory.items", f"expected list, got {type(items).__name__}")
+        return
+    for i, it in enumerate(items):
+        path = f"inventory.items[{i}]"
+        if not isinstance(it, dict):
+            err(errors, path, f"expected object, got {type(it).__name__}")
+            continue
+        ensure_type(errors, it, "pid", int, path)
+        ensure_type(errors, it, "quantity", int, path)
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Validate bridge state schema contracts")
     parser.add_argument("--state", required=True, help="Path to agent_state.json")
@@ -70,6 +95,7 @@ def main() -> int:
     errors: List[str] = []
     check_dialogue_contract(data, errors)
     check_quests_contract(data, errors)
+    check_inventory_contract(data, errors)
 
     if errors:
         print("FAIL: schema contract violations")
@@ -9,7 +9,13 @@ import json
 import os
 import re
 import sys
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
+
+_NAME_RE = re.compile(r"^# (.+)", re.MULTILINE)
+_PERSONA_VOICE_SECTIONS = ("Personality", "Values", "Dialogue Style")
+_PERSONA_HEADING_RE = re.compile(
+    rf"## ({'|'.join(map(re.escape, _PERSONA_VOICE_SECTIONS))})(?=\n)"
+)
 
 
 def _load_json(path: str) -> Dict[str, Any]:
@@ -76,67 +82,76 @@ def _quest_summary(q: Dict[str, Any]) -> str:
     return f"{name}{loc_str} -- {desc[:60]}"
 
 
+def _loadout(state: Dict[str, Any]) -> Tuple[str, str, int]:
+    inv = state.get("inventory") or {}
+    equipped = inv.get("equipped") or {}
+    weapon = "unarmed"
+    for slot in ("right_hand", "left_hand"):
+        eq = equipped.get(slot)
+        if eq:
+            weapon = str(eq.get("name", weapon))
+            break
+    armor_eq = equipped.get("armor")
+    armor = str(armor_eq.get("name", "none")) if armor_eq else "none"
+    # pid/quantity are ints per the inventory contract (check_state_schema.py).
+    # Caps normally form a single stack, but the bridge doesn't guarantee it.
+    caps = 0
+    for it in inv.get("items") or []:
+        if it.get("pid") == 41:
+            caps += it.get("quantity", 0) or 0
+    return weapon, armor, caps
+
+
 def cmd_assess(args: argparse.Namespace) -> int:
     state = _load_json(args.state)
-    dlg = state.get("dialogue", {})
+    dlg = state.get("dialogue") or {}
+    ch = state.get("character") or {}
+    ds = ch.get("derived_stats") or {}
     speaker = str(dlg.get("speaker_name", "Unknown"))
     reply = str(dlg.get("reply_text", ""))
     options = dlg.get("options", [])
-    map_name = str(state.get("map", {}).get("name", "?"))
+    map_name = str((state.get("map") or {}).get("name", "?"))
 
-    print("=== DIALOGUE ===")
-    print(f"NPC: {speaker} | Map: {map_name}")
+    out: List[str] = []
+    out.append("=== DIALOGUE ===")
+    out.append(f"NPC: {speaker} | Map: {map_name}")
     if reply:
-        print(f'Reply: "{reply}"')
+        out.append(f'Reply: "{reply}"')
     if isinstance(options, list) and options:
-        print("Options:")
+        out.append("Options:")
         for i, opt in enumerate(options):
             text = opt if isinstance(opt, str) else str(opt.get("text", "?"))
-            print(f'  [{i}] "{text}"')
-    print()
+            out.append(f'  [{i}] "{text}"')
+    out.append("")
 
     history = _load_json_array(args.history)
     if history:
-        print("--- CONVERSATION SO FAR ---")
+        out.append("--- CONVERSATION SO FAR ---")
         for i, h in enumerate(history):
             h_reply = str(h.get("reply", "..."))[:80]
             h_opt = str(h.get("option_text", "?"))[:60]
-            print(f'  ({i + 1}) "{h_reply}" -> You chose: "{h_opt}"')
-        print()
+            out.append(f'  ({i + 1}) "{h_reply}" -> You chose: "{h_opt}"')
+        out.append("")
 
-    ch = state.get("character", {})
-    ds = ch.get("derived_stats", {})
-    inv = state.get("inventory", {})
-    equipped = inv.get("equipped", {})
-    weapon = "unarmed"
-    for slot in ("right_hand", "left_hand"):
-        eq = equipped.get(slot)
-        if eq:
-            weapon = str(eq.get("name", weapon))
-            break
-    armor_eq = equipped.get("armor")
-    armor = str(armor_eq.get("name", "none")) if armor_eq else "none"
-    caps = sum(
-        int(it.get("quantity", 0))
-        for it in inv.get("items", [])
-        if int(it.get("pid", -1)) == 41
-    )
+    weapon, armor, caps = _loadout(state)
 
-    print("--- CHARACTER STATE ---")
-    print(
+    out.append("--- CHARACTER STATE ---")
+    out.append(
         f'  HP: {ds.get("current_hp", "?")}/{ds.get("max_hp", "?")} | '
         f'Level: {ch.get("level", "?")} | Caps: {caps}'
     )
-    print(f"  Weapon: {weapon} | Armor: {armor}")
-    print()
-
-    quests = state.get("quests", [])
-    active = [q for q in quests if not q.get("completed", False)]
-    if active:
-        print("--- ACTIVE QUESTS ---")
-        for q in active:
-            print(f"  {_quest_summary(q)}")
-        print()
+    out.append(f"  Weapon: {weapon} | Armor: {armor}")
+    out.append("")
+
+    quest_lines = [
+        f"  {_quest_summary(q)}"
+        for q in state.get("quests", [])
+        if not q.get("completed", False)
+    ]
+    if quest_lines:
+        out.append("--- ACTIVE QUESTS ---")
+        out.extend(quest_lines)
+        out.append("")
 
     try:
         with open(args.objectives, "r", encoding="utf-8") as f:
@@ -145,32 +160,48 @@ def cmd_assess(args: argparse.Namespace) -> int:
         objectives = []
 
     if objectives:
-        print("--- SUB-OBJECTIVES ---")
+        out.append("--- SUB-OBJECTIVES ---")
         for obj in objectives:
-            print(f"  {obj}")
-        print()
-
-    print("--- REMINDERS ---")
-    print('  You can RECALL knowledge: recall "keyword" to search notes')
-    print("  You can BARTER with this NPC: select barter option or use barter command")
-    print('  You can NOTE anything interesting: note "category" "text"')
+            out.append(f"  {obj}")
+        out.append("")
+
+    out.append("--- REMINDERS ---")
+    out.append('  You can RECALL knowledge: recall "keyword" to search notes')
+    out.append("  You can BARTER with this NPC: select barter option or use barter command")
+    out.append('  You can NOTE anything interesting: note "category" "text"')
+    sys.stdout.write("\n".join(out) + "\n")
     return 0
 
 
+def _persona_voice_parts(text: str) -> List[str]:
+    """Return the Personality/Values/Dialogue Style bodies found in text.
+
+    A body runs from the line after its heading to the next "\\n## ", so an
+    empty section takes in the heading that follows it:
+
+    >>> _persona_voice_parts("# N\\n## Personality\\n## Values\\nv\\n")
+    ['## Values\\nv', 'v']
+    """
+    found: Dict[str, str] = {}
+    for m in _PERSONA_HEADING_RE.finditer(text):
+        if m.group(1) in found:
+            continue
+        start = m.end() + 1
+        end = text.find("\n## ", start)
+        found[m.group(1)] = (text[start:] if end == -1 else text[start:end]).strip()
+    return [found[s] for s in _PERSONA_VOICE_SECTIONS if s in found]
+
+
 def _persona_name_and_voice(path: str) -> (str, str):
     name = "Wanderer"
     persona = "sarcastic, witty, audacious rogue with main-character energy"
     try:
         with open(path, "r", encoding="utf-8") as f:
             text = f.read()
-        m = re.search(r"^# (.+)", text, re.MULTILINE)
+        m = _NAME_RE.search(text)
         if m:
             name = m.group(1).strip()
-        parts = []
-        for section in ("Personality", "Values", "Dialogue Style"):
-            m = re.search(rf"## {re.escape(section)}\n(.*?)(?=\n## |\Z)", text, re.DOTALL)
-            if m:
-                parts.append(m.group(1).strip())
+        parts = _persona_voice_parts(text)
         if parts:
             persona = " | ".join(parts)
     except Exception:
@@ -180,11 +211,13 @@ def _persona_name_and_voice(path: str) -> (str, str):
 
 def cmd_muse_prompt(args: argparse.Namespace) -> int:
     state = _load_json(args.state)
-    dlg = state.get("dialogue", {})
+    dlg = state.get("dialogue") or {}
+    ch = state.get("character") or {}
+    ds = ch.get("derived_stats") or {}
     speaker = str(dlg.get("speaker_name", "Unknown"))
     reply = str(dlg.get("reply_text", ""))
     options = dlg.get("options", [])
-    map_name = str(state.get("map", {}).get("name", "?"))
+    map_name = str((state.get("map") or {}).get("name", "?"))
 
     if not reply and not options:
         return 0
@@ -192,46 +225,32 @@ def cmd_muse_prompt(args: argparse.Namespace) -> int:
     name, persona = _persona_name_and_voice(args.persona)
 
     history = _load_json_array(args.history)
-    history_str = ""
     if history:
-        lines = []
+        lines = ["Conversation so far:"]
         for h in history[-5:]:
             lines.append(
                 f'NPC: "{str(h.get("reply", "..."))[:60]}" -> '
                 f'You chose: "{str(h.get("option_text", "?"))[:40]}"'
             )
-        history_str = "\n".join(lines)
+        hist_block = "\n".join(lines)
+    else:
+        hist_block = "This is the start of the conversation."
 
     opt_lines = []
-    if isinstance(options, list):
-        for i, opt in enumerate(options):
-            text = opt if isinstance(opt, str) else str(opt.get("text", "?"))
-            opt_lines.append(f'[{i}] "{text}"')
+    for i, opt in enumerate(options if isinstance(options, list) else ()):
+        text = opt if isinstance(opt, str) else str(opt.get("text", "?"))
+        opt_lines.append(f'[{i}] "{text}"')
     options_str = "\n".join(opt_lines)
 
-    ch = state.get("character", {})
-    ds = ch.get("derived_stats", {})
-    inv = state.get("inventory", {})
-    equipped = inv.get("equipped", {})
-    weapon = "unarmed"
-    for slot in ("right_hand", "left_hand"):
-        eq = equipped.get(slot)
-        if eq:
-            weapon = str(eq.get("name", weapon))
-            break
-    armor_eq = equipped.get("armor")
-    armor = str(armor_eq.get("name", "none")) if armor_eq else "none"
-    caps = sum(
-        int(it.get("quantity", 0))
-        for it in inv.get("items", [])
-        if int(it.get("pid", -1)) == 41
-    )
+    weapon, armor, caps = _loadout(state)
 
-    quests = state.get("quests", [])
-    active = [q for q in quests if not q.get("completed", False)]
-    quest_str = ", ".join(
-        str(q.get("name") or q.get("description", "?"))[:40] for q in active[:5]
-    ) if active else "none"
+    active_names = []
+    for q in state.get("quests", []):
+        if not q.get("completed", False):
+            active_names.append(str(q.get("name") or q.get("description", "?"))[:40])
+            if len(active_names) == 5:
+                break
+    quest_str = ", ".join(active_names) if active_names else "none"
 
     try:
         with open(args.objectives, "r", encoding="utf-8") as f:
@@ -240,11 +259,6 @@ def cmd_muse_prompt(args: argparse.Namespace) -> int:
     except Exception:
         obj_str = "none"
 
-    if history_str:
-        hist_block = f"Conversation so far:\n{history_str}"
-    else:
-        hist_block = "This is the start of the conversation."
-
     prompt = (
         f"You are {name}. Voice: {persona}\n\n"
         f"Talking to {speaker} in {map_name}.\n"
@@ -257,9 +271,9 @@ def cmd_muse_prompt(args: argparse.Namespace) -> int:
         f"Caps {caps}, wearing {armor}, wielding {weapon}\n\n"
         "Write a short in-character inner thought (under 25 words) reacting to these "
         "dialogue options. What catches your eye? What matters given your goals? "
-        "No quotes, no narration."
+        "No quotes, no narration.\n"
     )
-    print(prompt)
+    sys.stdout.write(prompt)
     return 0
 
 
@@ -272,7 +286,7 @@ def cmd_history_summary(args: argparse.Namespace) -> int:
         reply = str(h.get("reply", ""))[:80]
         opt = str(h.get("option_text", ""))[:60]
         lines.append(f'  NPC: "{reply}" -> Chose: "{opt}"')
-    print("\n".join(lines))
+    sys.stdout.write("\n".join(lines) + "\n")
     return 0
 
 
@@ -284,12 +298,20 @@ def cmd_persona_section(args: argparse.Namespace) -> int:
         print("Persona file not found", file=sys.stderr)
         return 1
 
-    pattern = rf"(## {re.escape(args.section)}\b.*?)(?=\n## |\Z)"
-    m = re.search(pattern, content, re.DOTALL)
-    if not m:
+    header = f"## {args.section}"
+    idx = content.find(header)
+    while idx != -1:
+        # Require a word boundary so "Value" does not match "## Values"
+        after = content[idx + len(header):idx + len(header) + 1]
+        if not (after.isalnum() or after == "_"):
+            break
+        idx = content.find(header, idx + 1)
+    if idx == -1:
         print(f'Section "{args.section}" not found')
         return 1
-    print(m.group(1).strip())
+    end = content.find("\n## ", idx + len(header))
+    section_text = content[idx:] if end == -1 else content[idx:end]
+    print(section_text.strip())
     return 0
 
 
@@ -25,10 +25,11 @@ def resolve_project_dir():
     return os.path.dirname(script_dir)
 
 def main():
-    # Drain stdin (hook input — not needed)
+    # Hook input isn't needed. Close fd 0 itself (sys.stdin.close() leaves it
+    # open) so a writer still sending gets EPIPE instead of a full pipe.
     try:
-        sys.stdin.read()
-    except Exception:
+        os.close(0)
+    except OSError:
         pass
 
     # Locate state file
@@ -61,6 +62,8 @@ def main():
     map_name = d.get("map", {}).get("name", "?")
     tile = d.get("player", {}).get("tile", "?")
     ctx = d.get("context", "?")
+    if not isinstance(ctx, str):
+        ctx = str(ctx)
     busy = d.get("player", {}).get("animation_busy", False)
 
     parts = [f"HP:{hp}/{max_hp}", map_name, f"tile:{tile}", ctx]
@@ -71,7 +74,7 @@ def main():
 
     # Combat details
     combat = d.get("combat", {})
-    if "gameplay_combat" in str(ctx):
+    if "gameplay_combat" in ctx:
         ap = combat.get("current_ap", "?")
         hostiles = combat.get("hostiles", [])
         alive = [h for h in hostiles if h.get("hp", 0) > 0]
@@ -85,7 +88,7 @@ def main():
         parts.append("AUTO-COMBAT")
 
     # Dialogue details
-    if "dialogue" in str(ctx):
+    if "dialogue" in ctx:
         dialog = d.get("dialogue", {})
         npc = dialog.get("speaker_name", "?")
         options = dialog.get("options", [])
@@ -112,7 +115,7 @@ def main():
             parts.append("PERK AVAILABLE")
 
     # Level-up flag in gameplay contexts
-    if str(ctx).startswith("gameplay_"):
+    if ctx.startswith("gameplay_"):
         char = d.get("character", {})
         if char.get("can_level_up"):
             parts.append("LEVEL-UP")